@@ -1,24 +1,31 @@
 """
-Unified API - Scrapes, stores, and serves data in one process
+Unified API - Serves stored data and enqueues refreshes for the worker
+
+Crawling happens in scraper/worker.py; this process only reads the shared
+database and writes refresh jobs, so it can run with several uvicorn workers.
 """
 import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from fastapi import FastAPI, BackgroundTasks
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from typing import List
 from pydantic import BaseModel
-from datetime import datetime
+from datetime import datetime, timezone
 import asyncio
 import json
 import os
+import secrets
+import time
 
-from scraper.fetcher import ArticleFetcher
-from scraper.parser import ArticleParser
 from db.models import init_db
 from db.operations import ArticleDB
+from db.queue import RefreshQueue
 from scraper.config import config
+from scraper.profiling import fold_spans
 
 app = FastAPI(title="AIdeas 2025 Unified API")
 
@@ -34,10 +41,6 @@ app.add_middleware(
 # Initialize database
 SessionMaker = init_db(config.DATABASE_URL)
 
-# Track last update time
-last_update = None
-is_updating = False
-
 
 class ArticleResponse(BaseModel):
     content_id: str
@@ -50,6 +53,42 @@ class ArticleResponse(BaseModel):
     is_finalist: bool
 
 
+class HistoryResponse(BaseModel):
+    content_id: str
+    run_id: int | None
+    likes_count: int | None
+    comments_count: int | None
+    engagement_score: float | None
+    snapshot_at: str | None
+
+
+class AuthorResponse(BaseModel):
+    author_key: str
+    author_name: str | None
+    author_alias: str | None
+    article_count: int
+    finalist_count: int
+    total_likes: int
+    total_comments: int
+    total_score: float
+    best_content_id: str | None
+    best_title: str | None
+    best_likes: int | None
+    best_comments: int | None
+    best_score: float | None
+
+
+class ScrapeRunResponse(BaseModel):
+    id: int
+    started_at: str | None
+    finished_at: str | None
+    pages: int | None
+    article_count: int | None
+    status: str
+    error: str | None
+    is_checkpoint: bool | None
+
+
 class StatsResponse(BaseModel):
     total_articles: int
     total_likes: int
@@ -58,46 +97,36 @@ class StatsResponse(BaseModel):
     is_updating: bool
 
 
-def fetch_and_store():
-    """Background task to fetch and store articles"""
-    global last_update, is_updating
-    
+@app.on_event("startup")
+async def startup_event():
+    """Queue a refresh on startup unless the stored data is still fresh"""
+    print("🚀 Starting unified API...")
+    session = SessionMaker()
     try:
-        is_updating = True
-        print("\n🔄 Fetching latest data from AWS...")
-        
-        # Fetch articles
-        fetcher = ArticleFetcher()
-        raw_articles = fetcher.fetch_all_articles()
-        fetcher.close()
-        
-        # Parse articles
-        parsed_articles = ArticleParser.parse_articles(raw_articles)
-        
-        # Store in database
-        session = SessionMaker()
-        db = ArticleDB(session)
-        
-        for article_data in parsed_articles:
-            db.upsert_article(article_data)
-        
-        session.close()
-        
-        last_update = datetime.utcnow().isoformat()
-        print(f"✅ Updated {len(parsed_articles)} articles at {last_update}")
-        
-    except Exception as e:
-        print(f"❌ Update failed: {e}")
+        status, job = RefreshQueue(session).request(
+            ttl=config.REFRESH_TTL,
+            queued_max_age=config.REFRESH_QUEUED_MAX_AGE,
+        )
+        if job is not None:
+            print(f"📥 Initial refresh {status} (job {job.id})")
+        else:
+            print("📦 Data is fresh, skipping initial refresh")
     finally:
-        is_updating = False
+        session.close()
 
 
-@app.on_event("startup")
-async def startup_event():
-    """Fetch data on startup"""
-    print("🚀 Starting unified API...")
-    print("📥 Fetching initial data...")
-    fetch_and_store()
+def _refresh_state() -> dict:
+    """Shared refresh state, read from the database"""
+    session = SessionMaker()
+    try:
+        queue = RefreshQueue(session)
+        last_success = queue.last_success()
+        return {
+            "last_update": last_success.isoformat() if last_success else None,
+            "is_updating": queue.is_busy(),
+        }
+    finally:
+        session.close()
 
 
 @app.get("/")
@@ -105,42 +134,138 @@ def root():
     return {
         "status": "ok",
         "service": "AIdeas 2025 Unified API",
-        "last_update": last_update,
-        "is_updating": is_updating
+        **_refresh_state(),
     }
 
 
+def _host_filter(exclude_host: bool) -> dict:
+    """Author exclusion arguments for the configured host accounts"""
+    if not exclude_host:
+        return {}
+    return {
+        "exclude_aliases": config.HOST_AUTHOR_ALIASES,
+        "exclude_names": config.HOST_AUTHOR_NAMES,
+    }
+
+
+def _leaderboard(db: ArticleDB, exclude_host: bool, finalist_only: bool, as_of: datetime | None):
+    """Current leaderboard, or the one rebuilt at the last run before as_of"""
+    host_filter = _host_filter(exclude_host)
+    
+    if as_of is None:
+        articles = db.get_leaderboard(
+            limit=None,
+            finalist_only=finalist_only,
+            **host_filter,
+        )
+        return [ArticleResponse(**article.to_dict()) for article in articles]
+    
+    # Ledger timestamps are naive UTC
+    if as_of.tzinfo is not None:
+        as_of = as_of.astimezone(timezone.utc).replace(tzinfo=None)
+    
+    run = db.get_run_as_of(as_of)
+    if run is None:
+        raise HTTPException(status_code=404, detail=f"No completed scrape run at or before {as_of.isoformat()}")
+    
+    rows = db.get_leaderboard_at_run(
+        run.id,
+        finalist_only=finalist_only,
+        **host_filter,
+    )
+    return [ArticleResponse(**row) for row in rows]
+
+
 @app.get("/leaderboard", response_model=List[ArticleResponse])
-def get_leaderboard(exclude_host: bool = True):
+def get_leaderboard(exclude_host: bool = True, as_of: datetime | None = None):
     """
     Get leaderboard (from database cache)
     
     Args:
-        exclude_host: Exclude Ben Fowler (AWS host) articles from rankings
+        exclude_host: Exclude the configured AWS host accounts from rankings
+        as_of: Rebuild the leaderboard as of the last scrape run at or before this time
     """
     session = SessionMaker()
     db = ArticleDB(session)
     
     try:
-        articles = db.get_leaderboard(limit=None, exclude_author="Ben Fowler" if exclude_host else None)
-        return [ArticleResponse(**article.to_dict()) for article in articles]
+        return _leaderboard(db, exclude_host, finalist_only=False, as_of=as_of)
     finally:
         session.close()
 
 
 @app.get("/leaderboard/finals", response_model=List[ArticleResponse])
-def get_finals_leaderboard(exclude_host: bool = True):
+def get_finals_leaderboard(exclude_host: bool = True, as_of: datetime | None = None):
     """Get leaderboard filtered to finalist articles only"""
     session = SessionMaker()
     db = ArticleDB(session)
 
     try:
-        articles = db.get_leaderboard(
-            limit=None,
-            exclude_author="Ben Fowler" if exclude_host else None,
-            finalist_only=True,
-        )
-        return [ArticleResponse(**article.to_dict()) for article in articles]
+        return _leaderboard(db, exclude_host, finalist_only=True, as_of=as_of)
+    finally:
+        session.close()
+
+
+@app.get("/articles/{content_id:path}/history", response_model=List[HistoryResponse])
+def get_article_history(content_id: str, limit: int = 50):
+    """
+    Get an article's engagement snapshots, newest first
+    
+    Content IDs are paths ("/content/..."); the route consumes the leading
+    slash, so /articles/content/.../history is normalised back to it.
+    """
+    content_id = "/" + content_id.lstrip("/")
+    session = SessionMaker()
+    db = ArticleDB(session)
+
+    try:
+        if db.get_article(content_id) is None:
+            raise HTTPException(status_code=404, detail=f"Article {content_id} not found")
+        history = db.get_engagement_history(content_id, limit=limit)
+        return [HistoryResponse(**snapshot.to_dict()) for snapshot in history]
+    finally:
+        session.close()
+
+
+@app.get("/search", response_model=List[ArticleResponse])
+def search_articles(q: str):
+    """Search articles by title"""
+    session = SessionMaker()
+    db = ArticleDB(session)
+
+    try:
+        return [ArticleResponse(**article.to_dict()) for article in db.search_by_title(q)]
+    finally:
+        session.close()
+
+
+@app.get("/authors", response_model=List[AuthorResponse])
+def get_author_leaderboard(exclude_host: bool = True, sort_by: str = 'total_score', limit: int | None = None):
+    """
+    Get authors ranked by precomputed aggregates
+    
+    Args:
+        exclude_host: Exclude the configured AWS host accounts from rankings
+        sort_by: total_score, total_likes, total_comments, best_score, article_count or finalist_count
+    """
+    session = SessionMaker()
+    db = ArticleDB(session)
+
+    try:
+        authors = db.get_author_leaderboard(limit=limit, sort_by=sort_by, **_host_filter(exclude_host))
+        return [AuthorResponse(**author.to_dict()) for author in authors]
+    finally:
+        session.close()
+
+
+@app.get("/runs", response_model=List[ScrapeRunResponse])
+def get_runs(limit: int = 50):
+    """Get the most recent scrape runs from the ledger"""
+    session = SessionMaker()
+    db = ArticleDB(session)
+
+    try:
+        return [ScrapeRunResponse(**run.to_dict()) for run in db.get_runs(limit=limit)]
     finally:
         session.close()
 
@@ -153,23 +278,180 @@ def get_stats():
     
     try:
         stats = db.get_stats()
+        state = _refresh_state()
         return StatsResponse(
             **stats,
-            last_updated=last_update,
-            is_updating=is_updating
+            last_updated=state["last_update"],
+            is_updating=state["is_updating"]
         )
     finally:
         session.close()
 
 
+def _client_key(request: Request) -> str | None:
+    """
+    Identify the caller for throttling
+    
+    Behind TRUSTED_PROXY_HOPS proxies, the caller is the address the
+    outermost trusted proxy appended to X-Forwarded-For; entries left of it
+    come from the client and are ignored.
+    """
+    forwarded = request.headers.get("x-forwarded-for")
+    if config.TRUSTED_PROXY_HOPS > 0 and forwarded:
+        hops = [hop.strip() for hop in forwarded.split(",") if hop.strip()]
+        if len(hops) >= config.TRUSTED_PROXY_HOPS:
+            return hops[-config.TRUSTED_PROXY_HOPS]
+    return request.client.host if request.client else None
+
+
+def _read_job_status(job_id: int) -> dict:
+    """Read a refresh job and its scrape run"""
+    session = SessionMaker()
+    try:
+        queue = RefreshQueue(session)
+        job = queue.get_job(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"Refresh job {job_id} not found")
+        if job.status == 'running' and queue.reap_expired():
+            session.refresh(job)
+        if job.status == 'queued' and queue.expire_unclaimed(config.REFRESH_QUEUED_MAX_AGE):
+            session.refresh(job)
+        run = ArticleDB(session).get_run(job.run_id) if job.run_id else None
+        return {"job": job.to_dict(), "run": run.to_dict() if run else None}
+    finally:
+        session.close()
+
+
+async def _job_status(job_id: int, wait: float = 0) -> dict:
+    """
+    Read a refresh job, polling until it finishes or wait elapses
+
+    Waits on the event loop so pending long-polls don't hold threadpool
+    threads that the sync endpoints need. wait must be finite (the
+    endpoints reject nan/inf), or the deadline would never pass.
+    """
+    deadline = time.monotonic() + min(wait, config.REFRESH_MAX_WAIT)
+    while True:
+        status = await run_in_threadpool(_read_job_status, job_id)
+        if status["job"]["status"] not in ('queued', 'running') or time.monotonic() >= deadline:
+            return status
+        await asyncio.sleep(config.WORKER_POLL_INTERVAL)
+
+
+def _request_refresh(client: str | None, force: bool):
+    session = SessionMaker()
+    try:
+        status, job = RefreshQueue(session).request(
+            client=client,
+            force=force,
+            ttl=config.REFRESH_TTL,
+            client_interval=config.REFRESH_CLIENT_INTERVAL,
+            queued_max_age=config.REFRESH_QUEUED_MAX_AGE,
+        )
+        return status, (job.id if job else None)
+    finally:
+        session.close()
+
+
 @app.post("/refresh")
-def refresh_data(background_tasks: BackgroundTasks):
-    """Trigger manual refresh"""
-    if is_updating:
-        return {"status": "already_updating", "message": "Update in progress"}
+async def refresh_data(request: Request, force: bool = False, wait: float = Query(0, ge=0, allow_inf_nan=False)):
+    """
+    Request a refresh, coalesced onto any job already queued or running
+    
+    Args:
+        force: Refresh even if the data is newer than the TTL
+        wait: Seconds to long-poll for the refresh to finish (capped)
+    """
+    status, job_id = await run_in_threadpool(_request_refresh, _client_key(request), force)
+    
+    if status == 'fresh':
+        return {"status": "fresh", "message": "Data is fresh", **(await run_in_threadpool(_refresh_state))}
+    if status == 'throttled':
+        raise HTTPException(
+            status_code=429,
+            detail="Refresh requested too recently from this client",
+            headers={"Retry-After": str(int(config.REFRESH_CLIENT_INTERVAL))},
+        )
     
-    background_tasks.add_task(fetch_and_store)
-    return {"status": "started", "message": "Refresh started in background"}
+    message = "Refresh queued" if status == 'queued' else "Attached to refresh in progress"
+    return {"status": status, "message": message, "job_id": job_id, **(await _job_status(job_id, wait))}
+
+
+@app.get("/refresh/{job_id}")
+async def refresh_status(job_id: int, wait: float = Query(0, ge=0, allow_inf_nan=False)):
+    """
+    Get a refresh job's status, optionally long-polling until it finishes
+    
+    Args:
+        wait: Seconds to wait for the job to finish (capped)
+    """
+    return await _job_status(job_id, wait)
+
+
+def _require_debug_token(x_debug_token: str | None = Header(default=None)):
+    """
+    Gate /debug endpoints, which expose server paths and stack frames
+
+    They 404 unless DEBUG_TOKEN is configured, and then need it as X-Debug-Token.
+    """
+    if not config.DEBUG_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_debug_token or not secrets.compare_digest(x_debug_token, config.DEBUG_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid or missing X-Debug-Token")
+
+
+@app.get("/debug/refresh-traces", dependencies=[Depends(_require_debug_token)])
+def list_refresh_traces():
+    """List stored refresh traces, newest first (record them with PROFILE_REFRESH=true on the worker)"""
+    session = SessionMaker()
+    db = ArticleDB(session)
+
+    try:
+        return [trace.to_dict() for trace in db.get_refresh_traces()]
+    finally:
+        session.close()
+
+
+def _get_trace(db: ArticleDB, trace_id: int):
+    trace = db.get_refresh_trace(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail=f"Refresh trace {trace_id} not found")
+    return trace
+
+
+@app.get("/debug/refresh-traces/{trace_id}", dependencies=[Depends(_require_debug_token)])
+def get_refresh_trace(trace_id: int):
+    """Get a refresh trace with its full span tree"""
+    session = SessionMaker()
+    db = ArticleDB(session)
+
+    try:
+        trace = _get_trace(db, trace_id)
+        return {**trace.to_dict(), "spans": json.loads(trace.spans)}
+    finally:
+        session.close()
+
+
+@app.get("/debug/refresh-traces/{trace_id}/folded", response_class=PlainTextResponse, dependencies=[Depends(_require_debug_token)])
+def get_refresh_trace_folded(trace_id: int, source: str = "spans"):
+    """
+    Get a refresh trace as folded stacks for flamegraph.pl or speedscope
+    
+    Args:
+        source: spans (self time in microseconds) or samples (sampled stack counts)
+    """
+    session = SessionMaker()
+    db = ArticleDB(session)
+
+    try:
+        trace = _get_trace(db, trace_id)
+        if source == "samples":
+            if not trace.folded_samples:
+                raise HTTPException(status_code=404, detail="Trace has no sampled stacks (PROFILE_SAMPLE_INTERVAL was 0)")
+            return trace.folded_samples
+        return fold_spans(json.loads(trace.spans))
+    finally:
+        session.close()
 
 
 @app.post("/cookies")
@@ -1,10 +1,12 @@
 """
 SQLAlchemy database models
 """
-from sqlalchemy import Column, String, Integer, Float, DateTime, Text, Boolean, create_engine
+from sqlalchemy import Column, String, Integer, Float, DateTime, Text, Boolean, Index, create_engine, event, text
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
+import time
 
 Base = declarative_base()
 
@@ -49,26 +51,224 @@ class Article(Base):
         }
 
 
+class AuthorStats(Base):
+    """
+    Per-author engagement aggregates, maintained by the ingestion path
+
+    Keyed by author alias (display name when the alias is missing). The
+    best article is the author's highest engagement_score article.
+    """
+    __tablename__ = 'author_stats'
+
+    author_key = Column(String, primary_key=True)
+    author_name = Column(String)
+    author_alias = Column(String, index=True)
+
+    article_count = Column(Integer, default=0)
+    finalist_count = Column(Integer, default=0)
+    total_likes = Column(Integer, default=0)
+    total_comments = Column(Integer, default=0)
+    total_score = Column(Float, default=0.0, index=True)
+
+    best_content_id = Column(String)
+    best_title = Column(String)
+    best_likes = Column(Integer, default=0)
+    best_comments = Column(Integer, default=0)
+    best_score = Column(Float, default=0.0)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        """Convert to dictionary for API responses"""
+        return {
+            'author_key': self.author_key,
+            'author_name': self.author_name,
+            'author_alias': self.author_alias,
+            'article_count': self.article_count,
+            'finalist_count': self.finalist_count,
+            'total_likes': self.total_likes,
+            'total_comments': self.total_comments,
+            'total_score': self.total_score,
+            'best_content_id': self.best_content_id,
+            'best_title': self.best_title,
+            'best_likes': self.best_likes,
+            'best_comments': self.best_comments,
+            'best_score': self.best_score,
+        }
+
+
+class ScrapeRun(Base):
+    """Ledger entry for a single refresh of the article feed"""
+    __tablename__ = 'scrape_runs'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    started_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    finished_at = Column(DateTime, index=True)
+    pages = Column(Integer, default=0)
+    article_count = Column(Integer, default=0)
+    status = Column(String, default='running', nullable=False)  # running | success | failed
+    error = Column(Text)
+
+    # A checkpoint run snapshots every article, not only the changed ones
+    is_checkpoint = Column(Boolean, default=False)
+
+    def to_dict(self):
+        """Convert to dictionary for API responses"""
+        return {
+            'id': self.id,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'pages': self.pages,
+            'article_count': self.article_count,
+            'status': self.status,
+            'error': self.error,
+            'is_checkpoint': self.is_checkpoint,
+        }
+
+
+class RefreshJob(Base):
+    """
+    Durable refresh request, claimed by a worker under a lease
+
+    At most one job is queued or running at a time; later requests attach
+    to it. A worker holds the lease while crawling and extends it with
+    heartbeats, so a crashed worker's job can be reclaimed once it expires.
+    """
+    __tablename__ = 'refresh_jobs'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    requested_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    requested_by = Column(String, index=True)
+    status = Column(String, default='queued', nullable=False, index=True)  # queued | running | success | failed
+    attempts = Column(Integer, default=0, nullable=False)
+    run_id = Column(Integer)
+
+    # Lease held by the worker running this job
+    lease_owner = Column(String)
+    lease_expires_at = Column(DateTime)
+    heartbeat_at = Column(DateTime)
+
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    error = Column(Text)
+
+    def to_dict(self):
+        """Convert to dictionary for API responses"""
+        return {
+            'id': self.id,
+            'requested_at': self.requested_at.isoformat() if self.requested_at else None,
+            'status': self.status,
+            'attempts': self.attempts,
+            'run_id': self.run_id,
+            'heartbeat_at': self.heartbeat_at.isoformat() if self.heartbeat_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'error': self.error,
+        }
+
+
+class RefreshTrace(Base):
+    """Profiling trace of one refresh (span tree plus optional sampled stacks)"""
+    __tablename__ = 'refresh_traces'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    run_id = Column(Integer, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    duration_ms = Column(Float)
+    sample_count = Column(Integer, default=0)
+    spans = Column(Text)  # JSON span tree
+    folded_samples = Column(Text)  # Folded sampled stacks, if sampling was on
+
+    def to_dict(self):
+        """Summary for API listings (without the span tree)"""
+        return {
+            'id': self.id,
+            'run_id': self.run_id,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'duration_ms': self.duration_ms,
+            'sample_count': self.sample_count,
+        }
+
+
 class EngagementHistory(Base):
-    """Historical snapshots of engagement metrics"""
+    """
+    Historical snapshots of engagement metrics
+
+    Rows written by a scrape run carry its run_id and hold the values that
+    run observed. Rows without a run_id predate the run ledger and hold the
+    value an article had before it changed.
+    """
     __tablename__ = 'engagement_history'
+    __table_args__ = (
+        # Serves "latest snapshot at or before run N" per article
+        Index('ix_engagement_history_content_run', 'content_id', 'run_id'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     content_id = Column(String, nullable=False, index=True)
+    run_id = Column(Integer)
     likes_count = Column(Integer)
     comments_count = Column(Integer)
     engagement_score = Column(Float)
     snapshot_at = Column(DateTime, default=datetime.utcnow, index=True)
 
+    def to_dict(self):
+        """Convert to dictionary for API responses"""
+        return {
+            'content_id': self.content_id,
+            'run_id': self.run_id,
+            'likes_count': self.likes_count,
+            'comments_count': self.comments_count,
+            'engagement_score': self.engagement_score,
+            'snapshot_at': self.snapshot_at.isoformat() if self.snapshot_at else None,
+        }
+
 
 def init_db(database_url: str):
     """Initialize database and return session maker"""
     engine = create_engine(database_url)
-    Base.metadata.create_all(engine)
+    if engine.dialect.name == 'sqlite':
+        _configure_sqlite(engine)
+    _create_tables(engine)
     _migrate_add_is_finalist(engine)
+    _migrate_add_history_run_id(engine)
     return sessionmaker(bind=engine)
 
 
+def _create_tables(engine, attempts: int = 5):
+    """
+    Create missing tables, tolerating other processes doing the same
+
+    Every uvicorn worker and the scrape worker run init_db at boot; on a
+    fresh DB another process can create a table between our existence
+    check and CREATE TABLE. A retry sees it and skips it.
+    """
+    for attempt in range(attempts):
+        try:
+            Base.metadata.create_all(engine)
+            return
+        except OperationalError as e:
+            if 'already exists' not in str(e) or attempt == attempts - 1:
+                raise
+            time.sleep(0.1 * (attempt + 1))
+
+
+def _configure_sqlite(engine):
+    """
+    Let the API processes read while the worker writes
+
+    WAL keeps readers off the writer's lock, and busy_timeout makes a
+    second writer wait for the lock instead of failing immediately.
+    """
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_conn, _record):
+        cursor = dbapi_conn.cursor()
+        # busy_timeout first so switching to WAL waits out a concurrent switch
+        cursor.execute("PRAGMA busy_timeout=30000")
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.close()
+
+
 def _migrate_add_is_finalist(engine):
     """Add is_finalist column if it doesn't exist (safe migration)."""
     with engine.connect() as conn:
@@ -82,3 +282,19 @@ def _migrate_add_is_finalist(engine):
             print("[DB] Migrated: added is_finalist column")
         except Exception:
             pass  # Column already exists
+
+
+def _migrate_add_history_run_id(engine):
+    """Add engagement_history.run_id and its lookup index if missing (safe migration)."""
+    with engine.connect() as conn:
+        try:
+            conn.execute(text("ALTER TABLE engagement_history ADD COLUMN run_id INTEGER"))
+            conn.commit()
+            print("[DB] Migrated: added engagement_history.run_id column")
+        except Exception:
+            conn.rollback()  # Column already exists
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_engagement_history_content_run "
+            "ON engagement_history (content_id, run_id)"
+        ))
+        conn.commit()
@@ -1,10 +1,12 @@
 """
 Database operations for article storage and retrieval
 """
-from typing import List, Dict, Optional
+from typing import Iterable, List, Dict, Optional, Sequence
+import json
+from sqlalchemy import func, or_
 from sqlalchemy.orm import Session
 from datetime import datetime
-from .models import Article, EngagementHistory
+from .models import Article, AuthorStats, EngagementHistory, RefreshTrace, ScrapeRun
 
 # Hardcoded set of finalist content IDs (from the top-50 announcement article)
 FINALIST_CONTENT_IDS = {
@@ -45,19 +47,53 @@ def is_finalist_article(content_id: str, title: str) -> bool:
     return False
 
 
+def author_key(alias: str | None, name: str | None) -> str:
+    """Key an author by alias, falling back to display name"""
+    return alias or name or 'Unknown'
+
+
+def _without_authors(query, model, aliases: Sequence[str], names: Sequence[str]):
+    """Filter out rows whose author alias or display name is listed"""
+    if aliases:
+        query = query.filter(or_(model.author_alias.is_(None), model.author_alias.notin_(aliases)))
+    if names:
+        query = query.filter(or_(model.author_name.is_(None), model.author_name.notin_(names)))
+    return query
+
+
+# Columns an author leaderboard can be ordered by
+AUTHOR_SORT_COLUMNS = {
+    'total_score': AuthorStats.total_score,
+    'total_likes': AuthorStats.total_likes,
+    'total_comments': AuthorStats.total_comments,
+    'best_score': AuthorStats.best_score,
+    'article_count': AuthorStats.article_count,
+    'finalist_count': AuthorStats.finalist_count,
+}
+
+
 class ArticleDB:
     """Database operations for articles"""
     
     def __init__(self, session: Session):
         self.session = session
+        # Authors whose aggregates are stale until flush_author_stats()
+        self.dirty_authors = set()
     
-    def upsert_article(self, article_data: Dict) -> Article:
+    def upsert_article(
+        self,
+        article_data: Dict,
+        run_id: Optional[int] = None,
+        checkpoint: bool = False,
+    ) -> Article:
         """
         Insert or update article
-        Creates historical snapshot if engagement changed
+        Creates historical snapshot if the article is new or engagement changed
         
         Args:
             article_data: Parsed article dictionary
+            run_id: Scrape run that observed this data
+            checkpoint: Snapshot even if engagement is unchanged
             
         Returns:
             Article model instance
@@ -77,9 +113,13 @@ class ArticleDB:
                 existing.comments_count != article_data['comments_count']
             )
             
-            if engagement_changed:
-                # Create historical snapshot
-                self._create_snapshot(existing)
+            old_key = author_key(existing.author_alias, existing.author_name)
+            new_key = author_key(article_data.get('author_alias'), article_data.get('author_name'))
+            if engagement_changed or old_key != new_key or any(
+                getattr(existing, field) != article_data.get(field)
+                for field in ('engagement_score', 'is_finalist', 'title', 'author_name')
+            ):
+                self.dirty_authors.update((old_key, new_key))
             
             # Update existing
             for key, value in article_data.items():
@@ -88,33 +128,221 @@ class ArticleDB:
             article = existing
         else:
             # Create new
+            engagement_changed = True
             article = Article(**article_data)
             self.session.add(article)
+            self.dirty_authors.add(author_key(article.author_alias, article.author_name))
+        
+        if engagement_changed or checkpoint:
+            # Record the values this run observed
+            self._create_snapshot(article, run_id)
         
         self.session.commit()
         return article
     
-    def _create_snapshot(self, article: Article):
+    def _create_snapshot(self, article: Article, run_id: Optional[int] = None):
         """Create historical snapshot of engagement metrics"""
         snapshot = EngagementHistory(
             content_id=article.content_id,
+            run_id=run_id,
             likes_count=article.likes_count,
             comments_count=article.comments_count,
             engagement_score=article.engagement_score,
         )
         self.session.add(snapshot)
     
+    def flush_author_stats(self):
+        """Recompute aggregates for authors touched since the last flush"""
+        if self.dirty_authors:
+            self.refresh_author_stats(self.dirty_authors)
+            self.dirty_authors = set()
+    
+    def refresh_author_stats(self, author_keys: Optional[Iterable[str]] = None):
+        """
+        Recompute author_stats rows from the articles table
+        
+        Args:
+            author_keys: Authors to recompute (all authors if None)
+        """
+        query = self.session.query(Article)
+        if author_keys is not None:
+            author_keys = list(author_keys)
+            # SQL mirror of author_key()
+            key_column = func.coalesce(
+                func.nullif(Article.author_alias, ''),
+                func.nullif(Article.author_name, ''),
+                'Unknown',
+            )
+            query = query.filter(key_column.in_(author_keys))
+        articles = query.all()
+        
+        by_author: Dict[str, List[Article]] = {}
+        for article in articles:
+            by_author.setdefault(author_key(article.author_alias, article.author_name), []).append(article)
+        
+        # Drop rows for authors who no longer have articles
+        stale = self.session.query(AuthorStats)
+        if author_keys is not None:
+            stale = stale.filter(AuthorStats.author_key.in_(author_keys))
+        if by_author:
+            stale = stale.filter(AuthorStats.author_key.notin_(list(by_author)))
+        stale.delete(synchronize_session=False)
+        
+        for key, author_articles in by_author.items():
+            best = max(author_articles, key=lambda a: a.engagement_score or 0)
+            stats = self.session.get(AuthorStats, key) or AuthorStats(author_key=key)
+            stats.author_name = best.author_name
+            stats.author_alias = best.author_alias
+            stats.article_count = len(author_articles)
+            stats.finalist_count = sum(1 for a in author_articles if a.is_finalist)
+            stats.total_likes = sum(a.likes_count or 0 for a in author_articles)
+            stats.total_comments = sum(a.comments_count or 0 for a in author_articles)
+            stats.total_score = sum(a.engagement_score or 0 for a in author_articles)
+            stats.best_content_id = best.content_id
+            stats.best_title = best.title
+            stats.best_likes = best.likes_count
+            stats.best_comments = best.comments_count
+            stats.best_score = best.engagement_score
+            self.session.add(stats)
+        
+        self.session.commit()
+    
+    def ensure_author_stats(self):
+        """Backfill author_stats if it is empty but articles exist"""
+        if self.session.query(AuthorStats.author_key).first() is None and \
+                self.session.query(Article.content_id).first() is not None:
+            print("[DB] Backfilling author_stats")
+            self.refresh_author_stats()
+    
+    def get_author_leaderboard(
+        self,
+        limit: Optional[int] = None,
+        sort_by: str = 'total_score',
+        exclude_aliases: Sequence[str] = (),
+        exclude_names: Sequence[str] = (),
+    ) -> List[AuthorStats]:
+        """Get authors ranked by a precomputed aggregate"""
+        query = _without_authors(self.session.query(AuthorStats), AuthorStats, exclude_aliases, exclude_names)
+        column = AUTHOR_SORT_COLUMNS.get(sort_by, AuthorStats.total_score)
+        query = query.order_by(column.desc(), AuthorStats.author_key)
+        
+        if limit:
+            query = query.limit(limit)
+        
+        return query.all()
+    
+    def start_run(self) -> ScrapeRun:
+        """
+        Open a new scrape run in the ledger
+        
+        The first run after an empty ledger is a checkpoint, so every
+        article gets a baseline snapshot that later runs can diff against.
+        """
+        has_checkpoint = (
+            self.session.query(ScrapeRun.id)
+            .filter(ScrapeRun.is_checkpoint == True, ScrapeRun.status == 'success')  # noqa: E712
+            .first()
+        )
+        run = ScrapeRun(started_at=datetime.utcnow(), is_checkpoint=has_checkpoint is None)
+        self.session.add(run)
+        self.session.commit()
+        return run
+    
+    def finish_run(
+        self,
+        run: ScrapeRun,
+        status: str,
+        pages: int = 0,
+        article_count: int = 0,
+        error: str | None = None,
+    ) -> ScrapeRun:
+        """
+        Close a scrape run with its outcome
+        
+        A run already closed elsewhere (e.g. failed when its worker's lease
+        was reaped) keeps its status.
+        """
+        self.session.refresh(run)
+        if run.status != 'running':
+            return run
+        run.finished_at = datetime.utcnow()
+        run.status = status
+        run.pages = pages
+        run.article_count = article_count
+        run.error = error
+        self.session.commit()
+        return run
+    
+    def get_run(self, run_id: int) -> Optional[ScrapeRun]:
+        """Get single scrape run by ID"""
+        return self.session.query(ScrapeRun).filter_by(id=run_id).first()
+    
+    def get_runs(self, limit: int = 50) -> List[ScrapeRun]:
+        """Get most recent scrape runs"""
+        return (
+            self.session.query(ScrapeRun)
+            .order_by(ScrapeRun.id.desc())
+            .limit(limit)
+            .all()
+        )
+    
+    def get_run_as_of(self, as_of: datetime) -> Optional[ScrapeRun]:
+        """Get the latest successful run that finished at or before as_of"""
+        return (
+            self.session.query(ScrapeRun)
+            .filter(ScrapeRun.status == 'success', ScrapeRun.finished_at <= as_of)
+            .order_by(ScrapeRun.finished_at.desc())
+            .first()
+        )
+    
+    def save_refresh_trace(
+        self,
+        run_id: int,
+        trace: Dict,
+        folded_samples: str | None = None,
+        keep: int = 20,
+    ) -> RefreshTrace:
+        """Store a refresh trace, dropping all but the newest `keep` traces"""
+        record = RefreshTrace(
+            run_id=run_id,
+            duration_ms=trace['duration_ms'],
+            sample_count=trace.get('samples', 0),
+            spans=json.dumps(trace['spans']),
+            folded_samples=folded_samples,
+        )
+        self.session.add(record)
+        self.session.flush()
+        
+        newest = (
+            self.session.query(RefreshTrace.id)
+            .order_by(RefreshTrace.id.desc())
+            .limit(keep)
+        )
+        (
+            self.session.query(RefreshTrace)
+            .filter(RefreshTrace.id.notin_(newest))
+            .delete(synchronize_session=False)
+        )
+        self.session.commit()
+        return record
+    
+    def get_refresh_traces(self) -> List[RefreshTrace]:
+        """Get stored refresh traces, newest first"""
+        return self.session.query(RefreshTrace).order_by(RefreshTrace.id.desc()).all()
+    
+    def get_refresh_trace(self, trace_id: int) -> Optional[RefreshTrace]:
+        """Get single refresh trace by ID"""
+        return self.session.query(RefreshTrace).filter_by(id=trace_id).first()
+    
     def get_leaderboard(
         self, 
         limit: Optional[int] = 100, 
         sort_by: str = 'engagement_score',
-        exclude_author: str | None = None,
+        exclude_aliases: Sequence[str] = (),
+        exclude_names: Sequence[str] = (),
         finalist_only: bool = False,
     ) -> List[Article]:
-        query = self.session.query(Article)
-        
-        if exclude_author:
-            query = query.filter(Article.author_name != exclude_author)
+        query = _without_authors(self.session.query(Article), Article, exclude_aliases, exclude_names)
         
         if finalist_only:
             query = query.filter(Article.is_finalist == True)  # noqa: E712
@@ -131,6 +359,71 @@ class ArticleDB:
         
         return query.all()
     
+    def get_leaderboard_at_run(
+        self,
+        run_id: int,
+        sort_by: str = 'engagement_score',
+        exclude_aliases: Sequence[str] = (),
+        exclude_names: Sequence[str] = (),
+        finalist_only: bool = False,
+    ) -> List[Dict]:
+        """
+        Rebuild the leaderboard as it stood after a scrape run
+        
+        Uses each article's latest snapshot at or before run_id, which the
+        (content_id, run_id) index resolves without a correlated scan.
+        
+        Returns:
+            Article dictionaries with engagement metrics as of that run
+        """
+        latest = (
+            self.session.query(
+                EngagementHistory.content_id,
+                func.max(EngagementHistory.run_id).label('run_id'),
+            )
+            .filter(EngagementHistory.run_id <= run_id)
+            .group_by(EngagementHistory.content_id)
+            .subquery()
+        )
+        query = (
+            self.session.query(Article, EngagementHistory)
+            .join(latest, Article.content_id == latest.c.content_id)
+            .join(
+                EngagementHistory,
+                (EngagementHistory.content_id == latest.c.content_id)
+                & (EngagementHistory.run_id == latest.c.run_id),
+            )
+        )
+        
+        query = _without_authors(query, Article, exclude_aliases, exclude_names)
+        
+        if finalist_only:
+            query = query.filter(Article.is_finalist == True)  # noqa: E712
+        
+        if sort_by == 'likes_count':
+            query = query.order_by(EngagementHistory.likes_count.desc())
+        elif sort_by == 'comments_count':
+            query = query.order_by(EngagementHistory.comments_count.desc())
+        else:
+            query = query.order_by(EngagementHistory.engagement_score.desc())
+        
+        board = []
+        seen = set()
+        for article, snapshot in query.all():
+            # A run may snapshot an article twice if the feed repeats it
+            if article.content_id in seen:
+                continue
+            seen.add(article.content_id)
+            row = article.to_dict()
+            row.update(
+                likes_count=snapshot.likes_count,
+                comments_count=snapshot.comments_count,
+                engagement_score=snapshot.engagement_score,
+                last_updated=snapshot.snapshot_at.isoformat() if snapshot.snapshot_at else None,
+            )
+            board.append(row)
+        return board
+    
     def get_article(self, content_id: str) -> Optional[Article]:
         """Get single article by ID"""
         return self.session.query(Article).filter_by(content_id=content_id).first()
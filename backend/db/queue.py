@@ -0,0 +1,263 @@
+"""
+Refresh job queue shared by the API processes and the scrape worker
+"""
+from typing import Optional, Tuple
+from sqlalchemy import DateTime, bindparam, func, text
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from .models import RefreshJob, ScrapeRun
+
+# A job whose worker keeps dying is failed instead of requeued forever
+MAX_JOB_ATTEMPTS = 3
+
+
+class RefreshQueue:
+    """Queue operations for refresh jobs"""
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def get_job(self, job_id: int) -> Optional[RefreshJob]:
+        """Get single job by ID"""
+        return self.session.query(RefreshJob).filter_by(id=job_id).first()
+
+    def active_job(self) -> Optional[RefreshJob]:
+        """Get the queued or running job, if any"""
+        return (
+            self.session.query(RefreshJob)
+            .filter(RefreshJob.status.in_(('queued', 'running')))
+            .order_by(RefreshJob.id)
+            .first()
+        )
+
+    def is_busy(self) -> bool:
+        """Whether a worker currently holds a live lease"""
+        return (
+            self.session.query(RefreshJob.id)
+            .filter(
+                RefreshJob.status == 'running',
+                RefreshJob.lease_expires_at > datetime.utcnow(),
+            )
+            .first()
+        ) is not None
+
+    def last_success(self) -> Optional[datetime]:
+        """Finish time of the last successful scrape run"""
+        run = (
+            self.session.query(ScrapeRun)
+            .filter(ScrapeRun.status == 'success')
+            .order_by(ScrapeRun.finished_at.desc())
+            .first()
+        )
+        return run.finished_at if run else None
+
+    def request(
+        self,
+        client: Optional[str] = None,
+        force: bool = False,
+        ttl: float = 0,
+        client_interval: float = 0,
+        queued_max_age: Optional[float] = None,
+    ) -> Tuple[str, Optional[RefreshJob]]:
+        """
+        Ask for a refresh, coalesced onto any job already queued or running
+
+        Args:
+            client: Caller identity for throttling (None is never throttled)
+            force: Ignore the freshness TTL
+            ttl: Seconds a successful run counts as fresh
+            client_interval: Minimum seconds between jobs enqueued by one client
+            queued_max_age: Fail queued jobs no worker claimed within this many seconds
+
+        Returns:
+            (status, job) where status is one of fresh, attached, queued or
+            throttled; job is set for attached and queued
+        """
+        now = datetime.utcnow()
+
+        # A dead worker never reaps its own job, so requests do it too
+        self.reap_expired(now)
+        if queued_max_age is not None:
+            self.expire_unclaimed(queued_max_age)
+
+        job = self.active_job()
+        if job is not None:
+            return 'attached', job
+
+        last_success = self.last_success()
+        if not force and last_success and now - last_success < timedelta(seconds=ttl):
+            return 'fresh', None
+
+        if client is not None:
+            recent = (
+                self.session.query(RefreshJob.id)
+                .filter(
+                    RefreshJob.requested_by == client,
+                    RefreshJob.requested_at > now - timedelta(seconds=client_interval),
+                )
+                .first()
+            )
+            if recent is not None:
+                return 'throttled', None
+
+        # Insert only if nothing is active, in one statement, so two API
+        # processes racing here cannot both enqueue
+        result = self.session.execute(
+            text(
+                "INSERT INTO refresh_jobs (requested_at, requested_by, status, attempts) "
+                "SELECT :now, :client, 'queued', 0 "
+                "WHERE NOT EXISTS ("
+                "  SELECT 1 FROM refresh_jobs WHERE status IN ('queued', 'running')"
+                ")"
+            ).bindparams(bindparam('now', type_=DateTime)),
+            {'now': now, 'client': client},
+        )
+        self.session.commit()
+        return ('queued' if result.rowcount else 'attached'), self.active_job()
+
+    def expire_unclaimed(self, max_age: float) -> int:
+        """
+        Fail queued jobs that no worker has claimed within max_age seconds
+
+        Without this, a missing or crashed worker leaves one queued job that
+        every later request attaches to forever. A requeued job's age counts
+        from its last heartbeat.
+
+        Returns:
+            Number of jobs failed
+        """
+        now = datetime.utcnow()
+        cutoff = now - timedelta(seconds=max_age)
+        expired = (
+            self.session.query(RefreshJob)
+            .filter(
+                RefreshJob.status == 'queued',
+                func.coalesce(RefreshJob.heartbeat_at, RefreshJob.requested_at) < cutoff,
+            )
+            .update(
+                {
+                    RefreshJob.status: 'failed',
+                    RefreshJob.finished_at: now,
+                    RefreshJob.error: f'Not claimed by a worker within {max_age:.0f}s',
+                },
+                synchronize_session=False,
+            )
+        )
+        self.session.commit()
+        if expired:
+            print(f"⚠️ Failed {expired} unclaimed refresh job(s); is the worker running?")
+        return expired
+
+    def claim(self, owner: str, lease_seconds: float) -> Optional[RefreshJob]:
+        """
+        Lease the next queued job to a worker
+
+        Jobs whose lease expired are requeued (or failed after
+        MAX_JOB_ATTEMPTS) first. Nothing is claimed while another worker
+        holds a live lease, so only one crawl runs at a time.
+        """
+        now = datetime.utcnow()
+        self.reap_expired(now)
+
+        result = self.session.execute(
+            text(
+                "UPDATE refresh_jobs "
+                "SET status = 'running', lease_owner = :owner, lease_expires_at = :expires, "
+                "    heartbeat_at = :now, started_at = :now, attempts = attempts + 1 "
+                "WHERE id = ("
+                "  SELECT id FROM refresh_jobs WHERE status = 'queued' ORDER BY id LIMIT 1"
+                ") AND NOT EXISTS ("
+                "  SELECT 1 FROM refresh_jobs WHERE status = 'running' AND lease_expires_at > :now"
+                ")"
+            ).bindparams(bindparam('now', type_=DateTime), bindparam('expires', type_=DateTime)),
+            {'owner': owner, 'expires': now + timedelta(seconds=lease_seconds), 'now': now},
+        )
+        self.session.commit()
+        if not result.rowcount:
+            return None
+
+        return (
+            self.session.query(RefreshJob)
+            .filter_by(status='running', lease_owner=owner)
+            .order_by(RefreshJob.id.desc())
+            .first()
+        )
+
+    def reap_expired(self, now: Optional[datetime] = None) -> int:
+        """
+        Requeue or fail running jobs whose worker stopped heartbeating
+
+        Called by claim() and by the API, since a worker that was killed
+        mid-crawl is not around to reap its own job. A requeued job that no
+        worker picks up is then failed by expire_unclaimed().
+
+        Returns:
+            Number of expired jobs
+        """
+        now = now or datetime.utcnow()
+        expired = (
+            self.session.query(RefreshJob)
+            .filter(RefreshJob.status == 'running', RefreshJob.lease_expires_at <= now)
+            .all()
+        )
+        for job in expired:
+            if job.run_id is not None:
+                run = self.session.query(ScrapeRun).filter_by(id=job.run_id).first()
+                if run is not None and run.status == 'running':
+                    run.status = 'failed'
+                    run.finished_at = now
+                    run.error = 'Worker lease expired'
+
+            print(f"⚠️ Lease expired for job {job.id} (owner {job.lease_owner})")
+            job.lease_owner = None
+            job.lease_expires_at = None
+            job.run_id = None
+            if job.attempts >= MAX_JOB_ATTEMPTS:
+                job.status = 'failed'
+                job.finished_at = now
+                job.error = f'Lease expired {job.attempts} times'
+            else:
+                job.status = 'queued'
+        self.session.commit()
+        return len(expired)
+
+    def heartbeat(self, job_id: int, owner: str, lease_seconds: float, run_id: Optional[int] = None) -> bool:
+        """
+        Extend a job's lease
+
+        Returns:
+            False if the lease was lost to another worker
+        """
+        now = datetime.utcnow()
+        values = {
+            RefreshJob.heartbeat_at: now,
+            RefreshJob.lease_expires_at: now + timedelta(seconds=lease_seconds),
+        }
+        if run_id is not None:
+            values[RefreshJob.run_id] = run_id
+
+        updated = (
+            self.session.query(RefreshJob)
+            .filter_by(id=job_id, lease_owner=owner, status='running')
+            .update(values, synchronize_session=False)
+        )
+        self.session.commit()
+        return updated == 1
+
+    def complete(self, job_id: int, owner: str, status: str, error: str | None = None) -> bool:
+        """Close a leased job with its outcome (success or failed)"""
+        updated = (
+            self.session.query(RefreshJob)
+            .filter_by(id=job_id, lease_owner=owner, status='running')
+            .update(
+                {
+                    RefreshJob.status: status,
+                    RefreshJob.finished_at: datetime.utcnow(),
+                    RefreshJob.lease_expires_at: None,
+                    RefreshJob.error: error,
+                },
+                synchronize_session=False,
+            )
+        )
+        self.session.commit()
+        return updated == 1
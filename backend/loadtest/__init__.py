@@ -0,0 +1 @@
+"""Read-API load tests with latency baselines"""
@@ -0,0 +1,264 @@
+"""
+Read-API load test with latency SLO regression checks
+
+Seeds a throwaway SQLite DB at each scale, starts api.unified:app under
+uvicorn (no worker runs, so nothing hits AWS), and drives the read
+endpoints at increasing concurrency - once idle and once while a bulk
+refresh writes through the real parse/store path with a synthetic feed.
+Throughput and p50/p95/p99 latency are compared against stored baselines.
+
+From the backend directory:
+
+    python -m loadtest.run                           # small scale, compare to baselines
+    python -m loadtest.run --scales small,medium --workers 2
+    python -m loadtest.run --update-baselines        # record this machine's numbers
+
+Exits non-zero if any measurement errors, regresses past the tolerance, or
+has no stored baseline (unless --update-baselines is recording them).
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+import httpx
+
+from loadtest.seed import SCALES, SyntheticFetcher, seed_database
+
+BACKEND_DIR = Path(__file__).parent.parent.absolute()
+DEFAULT_BASELINES = Path(__file__).parent / "baselines.json"
+
+
+def endpoint_paths(facts: Dict, rng: random.Random) -> Dict:
+    """Request path generators per endpoint, randomised per call"""
+    return {
+        'leaderboard': lambda: "/leaderboard",
+        'finals': lambda: "/leaderboard/finals",
+        'stats': lambda: "/stats",
+        'authors': lambda: "/authors",
+        'leaderboard_as_of': lambda: f"/leaderboard?as_of={rng.choice(facts['as_of'])}",
+        'history': lambda: f"/articles/{rng.choice(facts['content_ids']).lstrip('/')}/history",
+        'search': lambda: f"/search?q={rng.choice(facts['words'])}",
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(database_url: str, port: int, workers: int) -> subprocess.Popen:
+    """Start uvicorn on the seeded DB and wait until it answers"""
+    env = dict(os.environ, DATABASE_URL=database_url)
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "api.unified:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning",
+        ],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/", timeout=1).status_code == 200:
+                return server
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+
+    server.terminate()
+    raise RuntimeError("uvicorn did not start within 30s")
+
+
+def percentile(ordered: List[float], pct: int) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def drive(base_url: str, path_fn, concurrency: int, duration: float) -> Dict:
+    """Hammer one endpoint with `concurrency` clients for `duration` seconds"""
+    latencies = []
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        deadline = time.perf_counter() + duration
+
+        async def user():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    response = await client.get(path_fn())
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        began = time.perf_counter()
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - began
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50': round(percentile(latencies, 50), 2),
+        'p95': round(percentile(latencies, 95), 2),
+        'p99': round(percentile(latencies, 99), 2),
+    }
+
+
+class BulkWriter(threading.Thread):
+    """Runs back-to-back synthetic refreshes against the DB while load is applied"""
+
+    def __init__(self, database_url: str, articles: int, churn: float):
+        super().__init__(name="bulk-writer", daemon=True)
+        self.database_url = database_url
+        self.fetcher = SyntheticFetcher(articles, churn=churn, seed=1)
+        self.stopped = threading.Event()
+        self.refreshes = 0
+
+    def run(self):
+        from db.models import init_db
+        from db.operations import ArticleDB
+        from scraper.worker import fetch_and_store
+
+        SessionMaker = init_db(self.database_url)
+        while not self.stopped.is_set():
+            session = SessionMaker()
+            try:
+                db = ArticleDB(session)
+                fetch_and_store(db, db.start_run(), fetcher_factory=lambda: self.fetcher)
+                self.refreshes += 1
+            finally:
+                session.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def check(key: str, result: Dict, baseline: Dict | None, tolerance: float) -> List[str]:
+    """Compare a result to its baseline, returning regression messages"""
+    problems = []
+    if result['errors']:
+        problems.append(f"{key}: {result['errors']} failed requests")
+    if baseline is None:
+        return problems
+
+    if result['rps'] < baseline['rps'] * (1 - tolerance):
+        problems.append(f"{key}: throughput {result['rps']} rps < baseline {baseline['rps']} rps")
+    for pct in ('p50', 'p95', 'p99'):
+        if result[pct] > baseline[pct] * (1 + tolerance):
+            problems.append(f"{key}: {pct} {result[pct]} ms > baseline {baseline[pct]} ms")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Read-API load test with latency baselines")
+    parser.add_argument("--scales", default="small", help=f"Comma-separated, from {', '.join(SCALES)}")
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated client counts")
+    parser.add_argument("--endpoints", default=None, help="Comma-separated subset of endpoints")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per measurement")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--no-writer", action="store_true", help="Skip the during-refresh scenario")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed regression (0.25 = 25%%)")
+    parser.add_argument("--baselines", type=Path, default=DEFAULT_BASELINES)
+    parser.add_argument("--update-baselines", action="store_true", help="Store this run as the baselines")
+    parser.add_argument("--output", type=Path, help="Also write raw results as JSON")
+    args = parser.parse_args()
+
+    baselines = json.loads(args.baselines.read_text()) if args.baselines.exists() else {}
+    scenarios = ['idle'] if args.no_writer else ['idle', 'refreshing']
+    levels = [int(c) for c in args.concurrency.split(",")]
+    results = {}
+    problems = []
+
+    for scale in args.scales.split(","):
+        shape = SCALES[scale]
+        with tempfile.TemporaryDirectory() as tmp:
+            database_url = f"sqlite:///{Path(tmp) / 'loadtest.db'}"
+            print(f"\n🌱 Seeding {scale}: {shape['articles']} articles x {shape['runs']} runs")
+            facts = seed_database(database_url, shape['articles'], shape['runs'], shape['churn'])
+            endpoints = endpoint_paths(facts, random.Random(0))
+            if args.endpoints:
+                endpoints = {name: endpoints[name] for name in args.endpoints.split(",")}
+
+            port = free_port()
+            server = start_server(database_url, port, args.workers)
+            try:
+                for scenario in scenarios:
+                    writer = None
+                    if scenario == 'refreshing':
+                        writer = BulkWriter(database_url, shape['articles'], shape['churn'])
+                        writer.start()
+                    try:
+                        for name, path_fn in endpoints.items():
+                            for concurrency in levels:
+                                key = f"{scale}/w{args.workers}/{scenario}/{name}/c{concurrency}"
+                                result = asyncio.run(
+                                    drive(f"http://127.0.0.1:{port}", path_fn, concurrency, args.duration)
+                                )
+                                results[key] = result
+                                problems += check(key, result, baselines.get(key), args.tolerance)
+                                print(
+                                    f"{key:<55} {result['rps']:>8} rps  "
+                                    f"p50 {result['p50']:>8} ms  p95 {result['p95']:>8} ms  "
+                                    f"p99 {result['p99']:>8} ms  err {result['errors']}"
+                                )
+                    finally:
+                        if writer is not None:
+                            writer.stop()
+                            print(f"✍️  {writer.refreshes} bulk refreshes completed during load")
+            finally:
+                server.terminate()
+                server.wait()
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+
+    if args.update_baselines:
+        baselines.update(results)
+        args.baselines.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n")
+        print(f"\n📌 Stored {len(results)} baselines in {args.baselines}")
+        return
+
+    missing = [key for key in results if key not in baselines]
+    if missing:
+        print(f"\n❌ {len(missing)} measurements have no baseline in {args.baselines}:")
+        for key in missing:
+            print(f"  - {key}")
+        print("Record baselines on the reference machine with --update-baselines")
+    if problems:
+        print("\n❌ Regressions:")
+        for problem in problems:
+            print(f"  - {problem}")
+    if missing or problems:
+        sys.exit(1)
+    print("\n✅ No regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Synthetic data for load tests - articles, scrape runs and engagement history
+"""
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from sqlalchemy import insert
+
+from db.models import init_db, Article, EngagementHistory, ScrapeRun
+from db.operations import ArticleDB, is_finalist_article
+from scraper.parser import ArticleParser
+
+# articles: feed size, runs: ledger length, churn: share of articles changing per run
+SCALES = {
+    'small': {'articles': 200, 'runs': 24, 'churn': 0.3},
+    'medium': {'articles': 1000, 'runs': 168, 'churn': 0.2},
+    'large': {'articles': 5000, 'runs': 720, 'churn': 0.1},
+}
+
+FINALIST_COUNT = 50
+WORDS = ['agent', 'bedrock', 'safety', 'vision', 'health', 'energy', 'tutor', 'farm', 'legal', 'music']
+
+
+def content_id(index: int) -> str:
+    """Content ID in the same shape the parser produces"""
+    return f"/content/lt{index:05d}/synthetic-article-{index}"
+
+
+def raw_article(index: int, likes: int, comments: int) -> Dict:
+    """Article in the AWS API response shape, for feeding through ArticleParser"""
+    author = index // 3  # ~3 articles per author
+    prefix = "AIdeas Finalist: " if index < FINALIST_COUNT else ""
+    return {
+        'contentId': content_id(index),
+        'title': f"{prefix}{WORDS[index % len(WORDS)].title()} {WORDS[(index // 10) % len(WORDS)]} {index}",
+        'author': {'preferredName': f"Author {author}", 'alias': f"author{author}"},
+        'likesCount': likes,
+        'commentsCount': comments,
+        'lastPublishedAt': 1_743_000_000_000 + index * 60_000,
+        'contentTypeSpecificResponse': {'article': {'description': 'Synthetic load-test article'}},
+    }
+
+
+class SyntheticFetcher:
+    """
+    Stand-in for ArticleFetcher that serves a drifting synthetic feed
+
+    Each fetch bumps engagement on a random share of articles so the
+    refresh path writes snapshots like a real crawl, without the network.
+    """
+
+    def __init__(self, articles: int, churn: float = 0.2, seed: int = 0):
+        self.rng = random.Random(seed)
+        self.churn = churn
+        self.likes = [self.rng.randint(0, 200) for _ in range(articles)]
+        self.comments = [self.rng.randint(0, 40) for _ in range(articles)]
+        self.pages_fetched = 0
+
+    def fetch_all_articles(self) -> List[Dict]:
+        for i in self.rng.sample(range(len(self.likes)), int(len(self.likes) * self.churn)):
+            self.likes[i] += self.rng.randint(1, 5)
+            self.comments[i] += self.rng.randint(0, 1)
+        self.pages_fetched = (len(self.likes) + 99) // 100
+        return [raw_article(i, self.likes[i], self.comments[i]) for i in range(len(self.likes))]
+
+    def close(self):
+        pass
+
+
+def seed_database(database_url: str, articles: int, runs: int, churn: float, seed: int = 0) -> Dict:
+    """
+    Fill an empty database with a synthetic feed and its run history
+
+    Runs are spaced an hour apart and end a minute ago; the first run is a
+    checkpoint, later runs snapshot only the articles that changed.
+
+    Returns:
+        Facts the load generator needs (content IDs, as_of times)
+    """
+    rng = random.Random(seed)
+    SessionMaker = init_db(database_url)
+    session = SessionMaker()
+
+    likes = [rng.randint(0, 50) for _ in range(articles)]
+    comments = [rng.randint(0, 10) for _ in range(articles)]
+    end = datetime.utcnow() - timedelta(minutes=1)
+    run_times = [end - timedelta(hours=runs - 1 - r) for r in range(runs)]
+
+    history = []
+    for run_id, finished_at in enumerate(run_times, start=1):
+        changed = range(articles) if run_id == 1 else rng.sample(range(articles), int(articles * churn))
+        for i in changed:
+            if run_id > 1:
+                likes[i] += rng.randint(1, 5)
+                comments[i] += rng.randint(0, 1)
+            history.append({
+                'content_id': content_id(i),
+                'run_id': run_id,
+                'likes_count': likes[i],
+                'comments_count': comments[i],
+                'engagement_score': float(likes[i] + comments[i]),
+                'snapshot_at': finished_at,
+            })
+
+    session.execute(insert(ScrapeRun), [
+        {
+            'id': run_id,
+            'started_at': finished_at - timedelta(seconds=30),
+            'finished_at': finished_at,
+            'pages': (articles + 99) // 100,
+            'article_count': articles,
+            'status': 'success',
+            'is_checkpoint': run_id == 1,
+        }
+        for run_id, finished_at in enumerate(run_times, start=1)
+    ])
+    session.execute(insert(EngagementHistory), history)
+
+    rows = []
+    for i in range(articles):
+        row = ArticleParser.parse_article(raw_article(i, likes[i], comments[i]))
+        row['is_finalist'] = is_finalist_article(row['content_id'], row['title'])
+        row['first_seen'] = run_times[0]
+        row['last_updated'] = end
+        rows.append(row)
+    session.execute(insert(Article), rows)
+    session.commit()
+
+    ArticleDB(session).refresh_author_stats()
+    session.close()
+
+    return {
+        'content_ids': [content_id(i) for i in range(articles)],
+        'as_of': [t.isoformat() for t in run_times],
+        'words': WORDS,
+    }
@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from pathlib import Path
+from typing import List
 
 # Get absolute path to backend directory
 BACKEND_DIR = Path(__file__).parent.parent.absolute()
@@ -16,13 +17,38 @@ class ScraperConfig(BaseSettings):
     RETRY_DELAY: float = 5.0
     MAX_RETRIES: int = 3
     
+    # Refresh coalescing (seconds)
+    REFRESH_TTL: float = 300.0  # Data newer than this is served without a crawl
+    REFRESH_CLIENT_INTERVAL: float = 60.0  # Min gap between crawls started by one client
+    # Reverse proxies in front of the API that append to X-Forwarded-For (1 on Render).
+    # 0 ignores the header, which callers can forge, and throttles by socket peer.
+    TRUSTED_PROXY_HOPS: int = 0
+    REFRESH_MAX_WAIT: float = 120.0  # Cap on long-poll waits
+    REFRESH_QUEUED_MAX_AGE: float = 300.0  # Queued jobs no worker claims within this are failed
+    
+    # Refresh worker (seconds)
+    WORKER_POLL_INTERVAL: float = 2.0  # How often an idle worker checks the queue
+    WORKER_LEASE: float = 120.0  # A job is reclaimable this long after its last heartbeat
+    WORKER_HEARTBEAT: float = 30.0
+    
     # User agent
     USER_AGENT: str = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
     
+    # Refresh profiling (traces are browsable at /debug/refresh-traces with DEBUG_TOKEN set)
+    PROFILE_REFRESH: bool = False  # Record a span tree per refresh
+    PROFILE_SAMPLE_INTERVAL: float = 0.0  # Seconds between stack samples, 0 disables sampling
+    PROFILE_TRACE_LIMIT: int = 20  # Traces kept; older ones are dropped
+    DEBUG_TOKEN: str = ""  # Required as X-Debug-Token by /debug endpoints; empty disables them
+    
     # Engagement scoring weights
     LIKE_WEIGHT: float = 1.0
     COMMENT_WEIGHT: float = 1.0
     
+    # Host accounts left out of rankings when exclude_host=true
+    # (env values are JSON lists, e.g. HOST_AUTHOR_ALIASES='["somealias"]')
+    HOST_AUTHOR_ALIASES: List[str] = []
+    HOST_AUTHOR_NAMES: List[str] = ["Ben Fowler"]  # Fallback for hosts whose alias isn't known
+    
     # Database (absolute path)
     DATABASE_URL: str = f"sqlite:///{DB_PATH}"
     
@@ -9,6 +9,7 @@ import time
 from typing import List, Dict, Optional
 from pathlib import Path
 from .config import config
+from .profiling import span
 
 
 class ArticleFetcher:
@@ -20,6 +21,7 @@ class ArticleFetcher:
             'User-Agent': config.USER_AGENT,
             'Accept': 'application/json',
         })
+        self.pages_fetched = 0
         self._load_cookies()
     
     def _load_cookies(self):
@@ -71,7 +73,9 @@ class ArticleFetcher:
             print(f"📥 Fetching page {page}...")
             
             try:
-                page_data = self._fetch_page(next_token)
+                with span("page fetch", page=page):
+                    page_data = self._fetch_page(next_token)
+                self.pages_fetched = page
                 
                 if not page_data or 'feedContents' not in page_data:
                     print("⚠️ No data returned")
@@ -118,7 +122,8 @@ class ArticleFetcher:
                     break
                 
                 page += 1
-                time.sleep(config.REQUEST_DELAY)  # Rate limiting
+                with span("rate-limit sleep"):
+                    time.sleep(config.REQUEST_DELAY)  # Rate limiting
                 
             except Exception as e:
                 print(f"❌ Error fetching page {page}: {e}")
@@ -148,11 +153,12 @@ class ArticleFetcher:
         
         for attempt in range(config.MAX_RETRIES):
             try:
-                response = self.session.get(
-                    url,
-                    params=params,
-                    timeout=30
-                )
+                with span("http request", attempt=attempt + 1):
+                    response = self.session.get(
+                        url,
+                        params=params,
+                        timeout=30
+                    )
                 
                 if response.status_code == 401:
                     raise Exception(
@@ -161,12 +167,14 @@ class ArticleFetcher:
                     )
                 
                 response.raise_for_status()
-                return response.json()
+                with span("decode json"):
+                    return response.json()
                 
             except requests.RequestException as e:
                 if attempt < config.MAX_RETRIES - 1:
                     print(f"⚠️ Attempt {attempt + 1} failed, retrying in {config.RETRY_DELAY}s...")
-                    time.sleep(config.RETRY_DELAY)
+                    with span("retry wait", attempt=attempt + 1):
+                        time.sleep(config.RETRY_DELAY)
                 else:
                     raise Exception(f"Failed after {config.MAX_RETRIES} attempts: {e}")
     
@@ -0,0 +1,168 @@
+"""
+Opt-in refresh profiling - span trees and sampled stacks
+
+Code on the refresh path marks phases with `span(...)`. With no profiler
+active, `span` returns a shared no-op context manager, so instrumentation
+costs one context-variable lookup per call.
+"""
+import contextlib
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+_active: ContextVar[Optional["RefreshProfiler"]] = ContextVar("refresh_profiler", default=None)
+_NO_SPAN = contextlib.nullcontext()
+
+
+def span(name: str, **attrs):
+    """Time a phase of the current refresh (no-op unless profiling)"""
+    profiler = _active.get()
+    if profiler is None:
+        return _NO_SPAN
+    return profiler.span(name, attrs)
+
+
+class Span:
+    """One timed phase with nested child phases"""
+
+    __slots__ = ("name", "attrs", "start", "end", "children")
+
+    def __init__(self, name: str, attrs: Dict, start: float):
+        self.name = name
+        self.attrs = attrs
+        self.start = start
+        self.end = None
+        self.children: List["Span"] = []
+
+    def to_dict(self, origin: float) -> Dict:
+        end = self.end if self.end is not None else time.perf_counter()
+        return {
+            "name": self.name,
+            "attrs": self.attrs,
+            "start_ms": round((self.start - origin) * 1000, 3),
+            "duration_ms": round((end - self.start) * 1000, 3),
+            "children": [child.to_dict(origin) for child in self.children],
+        }
+
+
+def _short_path(filename: str) -> str:
+    """Trim a source path to its last two components"""
+    parts = filename.replace("\\", "/").rsplit("/", 2)
+    return "/".join(parts[-2:])
+
+
+class StackSampler(threading.Thread):
+    """
+    Samples one thread's Python stack at a fixed interval
+
+    Samples are wall-clock, so time blocked in sleeps or socket reads
+    shows up alongside CPU work.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(name="refresh-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                # Function and file only, so samples on different lines merge
+                frames.append(f"{code.co_name} ({_short_path(code.co_filename)})")
+                frame = frame.f_back
+            if frames:
+                self.stacks[";".join(reversed(frames))] += 1
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+class RefreshProfiler:
+    """
+    Records a span tree (and optionally sampled stacks) for one refresh
+
+    Usage:
+        with RefreshProfiler(sample_interval=0.005) as profiler:
+            with span("refresh"):
+                ...
+        trace = profiler.to_dict()
+        fold_spans(trace["spans"]), profiler.folded_samples()
+    """
+
+    def __init__(self, sample_interval: Optional[float] = None):
+        self.sample_interval = sample_interval
+        self.roots: List[Span] = []
+        self._stack: List[Span] = []
+        self._sampler: Optional[StackSampler] = None
+        self._token = None
+        self.origin = None
+
+    def __enter__(self):
+        self.origin = time.perf_counter()
+        self._token = _active.set(self)
+        if self.sample_interval:
+            self._sampler = StackSampler(threading.get_ident(), self.sample_interval)
+            self._sampler.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._sampler is not None:
+            self._sampler.stop()
+        _active.reset(self._token)
+        return False
+
+    @contextlib.contextmanager
+    def span(self, name: str, attrs: Dict):
+        current = Span(name, attrs, time.perf_counter())
+        (self._stack[-1].children if self._stack else self.roots).append(current)
+        self._stack.append(current)
+        try:
+            yield current
+        finally:
+            current.end = time.perf_counter()
+            self._stack.pop()
+
+    def to_dict(self) -> Dict:
+        """Span tree as JSON-ready dicts"""
+        spans = [root.to_dict(self.origin) for root in self.roots]
+        return {
+            "duration_ms": round(sum(root["duration_ms"] for root in spans), 3),
+            "spans": spans,
+            "samples": sum(self._sampler.stacks.values()) if self._sampler else 0,
+        }
+
+    def folded_samples(self) -> Optional[str]:
+        """Sampled stacks in folded format (one 'frame;frame count' per line)"""
+        if self._sampler is None:
+            return None
+        return "\n".join(f"{stack} {count}" for stack, count in self._sampler.stacks.most_common())
+
+
+def fold_spans(spans: List[Dict]) -> str:
+    """
+    Span tree in folded format, weighted by self time in microseconds
+
+    Spans with the same name path (e.g. every page fetch) are merged, so
+    the output feeds straight into flamegraph.pl or speedscope.
+    """
+    weights = Counter()
+
+    def walk(node: Dict, path: str):
+        path = f"{path};{node['name']}" if path else node["name"]
+        child_ms = sum(child["duration_ms"] for child in node["children"])
+        weights[path] += max(0, round((node["duration_ms"] - child_ms) * 1000))
+        for child in node["children"]:
+            walk(child, path)
+
+    for root in spans:
+        walk(root, "")
+    return "\n".join(f"{path} {weight}" for path, weight in weights.items() if weight)
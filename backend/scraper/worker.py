@@ -0,0 +1,245 @@
+"""
+Refresh worker - pulls refresh jobs from the database queue and crawls
+
+Runs separately from the API so the API can scale across uvicorn workers
+while a single leased crawl runs at a time. From the backend directory:
+
+    python -m scraper.worker          # poll the queue forever
+    python -m scraper.worker --once   # run at most one queued job and exit
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import argparse
+import os
+import socket
+import threading
+import time
+import uuid
+
+from scraper.fetcher import ArticleFetcher
+from scraper.parser import ArticleParser
+from scraper.config import config
+from scraper.profiling import RefreshProfiler, span
+from db.models import init_db, RefreshJob, ScrapeRun
+from db.operations import ArticleDB
+from db.queue import RefreshQueue
+
+
+# Rows stored per "store batch" span (and between lease checks)
+STORE_SPAN_ROWS = 100
+
+
+class LeaseLost(Exception):
+    """The worker's lease on its job expired mid-crawl"""
+
+
+def fetch_and_store(
+    db: ArticleDB,
+    run: ScrapeRun,
+    fetcher_factory=ArticleFetcher,
+    lease_lost: threading.Event | None = None,
+) -> bool:
+    """
+    Fetch and store articles for an open scrape run, returns True on success
+
+    With PROFILE_REFRESH on, the run's span tree (and sampled stacks if
+    PROFILE_SAMPLE_INTERVAL is set) is saved as a refresh trace.
+
+    Args:
+        fetcher_factory: Builds the fetcher (swapped for a synthetic one in load tests)
+        lease_lost: Set when the job's lease is lost; the crawl stops writing and fails
+    """
+    if not config.PROFILE_REFRESH:
+        return _fetch_and_store(db, run, fetcher_factory, lease_lost)
+
+    with RefreshProfiler(sample_interval=config.PROFILE_SAMPLE_INTERVAL) as profiler:
+        with span("refresh", run_id=run.id):
+            succeeded = _fetch_and_store(db, run, fetcher_factory, lease_lost)
+
+    try:
+        trace = db.save_refresh_trace(
+            run.id,
+            profiler.to_dict(),
+            profiler.folded_samples(),
+            keep=config.PROFILE_TRACE_LIMIT,
+        )
+        print(f"🔬 Saved refresh trace {trace.id} ({trace.duration_ms:.0f} ms)")
+    except Exception as e:
+        db.session.rollback()
+        print(f"⚠️ Failed to save refresh trace: {e}")
+    return succeeded
+
+
+def _fetch_and_store(db: ArticleDB, run: ScrapeRun, fetcher_factory, lease_lost) -> bool:
+    pages = 0
+    stored = 0
+
+    def check_lease():
+        if lease_lost is not None and lease_lost.is_set():
+            raise LeaseLost(f"Lease lost after storing {stored} articles")
+
+    try:
+        print(f"\n🔄 Fetching latest data from AWS (run {run.id})...")
+
+        # Fetch articles
+        with span("fetch"):
+            fetcher = fetcher_factory()
+            raw_articles = fetcher.fetch_all_articles()
+            pages = fetcher.pages_fetched
+            fetcher.close()
+
+        # Parse articles
+        with span("parse", articles=len(raw_articles)):
+            parsed_articles = ArticleParser.parse_articles(raw_articles)
+
+        # Store in database
+        with span("store", articles=len(parsed_articles)):
+            for start in range(0, len(parsed_articles), STORE_SPAN_ROWS):
+                check_lease()
+                batch = parsed_articles[start:start + STORE_SPAN_ROWS]
+                with span("store batch", first_row=start, rows=len(batch)):
+                    for article_data in batch:
+                        db.upsert_article(article_data, run_id=run.id, checkpoint=run.is_checkpoint)
+                        stored += 1
+
+        with span("author stats", authors=len(db.dirty_authors)):
+            db.flush_author_stats()
+        check_lease()
+        db.finish_run(run, 'success', pages=pages, article_count=stored)
+        print(f"✅ Updated {len(parsed_articles)} articles at {run.finished_at.isoformat()} (run {run.id})")
+        return True
+
+    except Exception as e:
+        print(f"❌ Update failed: {e}")
+        db.session.rollback()
+        # Rows committed before the failure still need their authors re-aggregated
+        db.flush_author_stats()
+        db.finish_run(run, 'failed', pages=pages, article_count=stored, error=str(e))
+        return False
+
+
+class Heartbeat(threading.Thread):
+    """
+    Extends a job's lease in the background while it is being crawled
+
+    Sets `lost` once the lease is gone (another worker may own the job) or
+    heartbeats have failed for longer than the lease.
+    """
+
+    def __init__(self, SessionMaker, job_id: int, owner: str):
+        super().__init__(name=f"heartbeat-{job_id}", daemon=True)
+        self.SessionMaker = SessionMaker
+        self.job_id = job_id
+        self.owner = owner
+        self.stopped = threading.Event()
+        self.lost = threading.Event()
+
+    def run(self):
+        last_ok = time.monotonic()
+        while not self.stopped.wait(config.WORKER_HEARTBEAT):
+            session = self.SessionMaker()
+            try:
+                if not RefreshQueue(session).heartbeat(self.job_id, self.owner, config.WORKER_LEASE):
+                    print(f"⚠️ Lost lease on job {self.job_id}")
+                    self.lost.set()
+                    return
+                last_ok = time.monotonic()
+            except Exception as e:
+                print(f"⚠️ Heartbeat failed for job {self.job_id}: {e}")
+                if time.monotonic() - last_ok >= config.WORKER_LEASE:
+                    print(f"⚠️ Lease on job {self.job_id} has expired")
+                    self.lost.set()
+                    return
+            finally:
+                session.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+class RefreshWorker:
+    """Claims refresh jobs one at a time and runs the crawl for each"""
+
+    def __init__(self, SessionMaker):
+        self.SessionMaker = SessionMaker
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    def run_next(self) -> RefreshJob | None:
+        """
+        Claim and run the next queued job
+
+        Returns:
+            The finished job, or None if nothing was claimable
+        """
+        session = self.SessionMaker()
+        queue = RefreshQueue(session)
+        db = ArticleDB(session)
+
+        try:
+            job = queue.claim(self.owner, config.WORKER_LEASE)
+            if job is None:
+                return None
+
+            print(f"📋 Claimed job {job.id} (attempt {job.attempts})")
+            run = db.start_run()
+            queue.heartbeat(job.id, self.owner, config.WORKER_LEASE, run_id=run.id)
+
+            heartbeat = Heartbeat(self.SessionMaker, job.id, self.owner)
+            heartbeat.start()
+            try:
+                succeeded = fetch_and_store(db, run, lease_lost=heartbeat.lost)
+            finally:
+                heartbeat.stop()
+
+            completed = queue.complete(
+                job.id,
+                self.owner,
+                'success' if succeeded else 'failed',
+                error=None if succeeded else run.error,
+            )
+            if not completed:
+                # The job was reaped or reclaimed; its outcome is no longer ours to record
+                print(f"⚠️ Job {job.id} lease was lost; result of run {run.id} not recorded on the job")
+            session.refresh(job)
+            return job
+        finally:
+            session.close()
+
+    def run_forever(self):
+        """Poll the queue until interrupted"""
+        print(f"👷 Refresh worker {self.owner} polling every {config.WORKER_POLL_INTERVAL}s")
+        while True:
+            try:
+                job = self.run_next()
+            except Exception as e:
+                print(f"❌ Worker error: {e}")
+                job = None
+            if job is None:
+                time.sleep(config.WORKER_POLL_INTERVAL)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AIdeas 2025 refresh worker")
+    parser.add_argument("--once", action="store_true", help="Run at most one queued job and exit")
+    args = parser.parse_args()
+
+    SessionMaker = init_db(config.DATABASE_URL)
+    session = SessionMaker()
+    try:
+        ArticleDB(session).ensure_author_stats()
+    finally:
+        session.close()
+
+    worker = RefreshWorker(SessionMaker)
+    if args.once:
+        job = worker.run_next()
+        print(f"Job {job.id}: {job.status}" if job else "No queued job")
+    else:
+        worker.run_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -23,23 +23,33 @@ function App() {
     if (cookieStatus?.status === 'valid') fetchData()
   }, [cookieStatus])
 
+  const loadData = async () => {
+    const [finalsRes, statsRes] = await Promise.all([
+      fetch(`${API_BASE}/leaderboard/finals?exclude_host=true`),
+      fetch(`${API_BASE}/stats`),
+    ])
+
+    if (!finalsRes.ok) throw new Error('Failed to fetch finals leaderboard')
+    if (!statsRes.ok) throw new Error('Failed to fetch stats')
+
+    setFinalsLeaderboard(await finalsRes.json())
+    setStats(await statsRes.json())
+    setError(null)
+  }
+
   const fetchData = async () => {
     try {
       setDataLoading(true)
-      await fetch(`${API_BASE}/refresh`, { method: 'POST' })
-      await new Promise(resolve => setTimeout(resolve, 2000))
-
-      const [finalsRes, statsRes] = await Promise.all([
-        fetch(`${API_BASE}/leaderboard/finals?exclude_host=true`),
-        fetch(`${API_BASE}/stats`),
-      ])
-
-      if (!finalsRes.ok) throw new Error('Failed to fetch finals leaderboard')
-      if (!statsRes.ok) throw new Error('Failed to fetch stats')
+      // Show cached data right away; the backend skips the crawl if it's fresh
+      await loadData()
+      setLoading(false)
 
-      setFinalsLeaderboard(await finalsRes.json())
-      setStats(await statsRes.json())
-      setError(null)
+      const refreshRes = await fetch(`${API_BASE}/refresh`, { method: 'POST' })
+      const refresh = refreshRes.ok ? await refreshRes.json() : null
+      if (refresh?.job_id && ['queued', 'running'].includes(refresh.job?.status)) {
+        await fetch(`${API_BASE}/refresh/${refresh.job_id}?wait=120`)
+        await loadData()
+      }
     } catch (err) {
       setError(err.message)
     } finally {